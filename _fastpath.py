@@ -0,0 +1,92 @@
+"""Hot-path helpers for the BLE gateway.
+
+Everything here runs once per advertisement (or per publish) and is kept
+import-light and fully annotated so the module can optionally be compiled
+to a C extension with mypyc:
+
+    pip install mypy
+    mypyc _fastpath.py
+
+The gateway imports this module either way; the compiled extension simply
+shadows the pure-Python version when present.
+"""
+
+from collections import OrderedDict
+from collections.abc import Callable
+
+# Brand fingerprints used to discard advertisements from unrelated devices
+# (phones, earbuds, beacons, ...) before any wrapping or parsing work happens.
+# Company IDs are the Bluetooth SIG identifiers the vendors put in
+# manufacturer-specific data; name prefixes cover models that identify
+# themselves through the local name instead.
+BRANDS: tuple[str, ...] = ("govee", "thermopro", "inkbird", "sensorpush", "ruuvi")
+
+# ThermoPro has no entry here: its devices encode each reading in the
+# manufacturer-data key itself, so there is no stable company ID and the
+# "TP" name prefix is the fingerprint.
+BRAND_COMPANY_IDS: dict[str, frozenset[int]] = {
+    "govee": frozenset({0xEC88}),
+    "ruuvi": frozenset({0x0499}),
+}
+
+BRAND_NAME_PREFIXES: dict[str, tuple[str, ...]] = {
+    "govee": ("Govee", "GV"),
+    "thermopro": ("TP",),
+    "inkbird": ("sps", "tps", "IBS-", "ITH-", "IDT-", "idt-", "Ink@"),
+    "sensorpush": ("SensorPush",),
+    "ruuvi": ("Ruuvi",),
+}
+
+# Brands whose devices are identified by an advertised service UUID rather
+# than a usable name or company ID.  SensorPush models (the HT1 advertises
+# the local name "s") share the ef090000 base across the V1 and V2
+# advertising UUIDs, so the string prefix is the fingerprint.
+BRAND_SERVICE_UUID_PREFIXES: dict[str, tuple[str, ...]] = {
+    "sensorpush": ("ef090000-",),
+}
+
+# Per-sensor payload formatters: one formatted string per value instead of
+# a round() intermediate float plus str() and a branch on every publish.
+PAYLOAD_FORMATTERS: dict[str, Callable[[float], str]] = {
+    "temperature": lambda v: f"{v:.1f}",
+    "humidity": lambda v: f"{v:.1f}",
+    "battery": lambda v: str(int(v)),
+    "pressure": lambda v: f"{v:.1f}",
+    "voltage": lambda v: f"{v:.1f}",
+}
+
+
+def lru_get(cache: OrderedDict, key: str):
+    """Return the cached value and mark it most-recently-used, or None."""
+    value = cache.get(key)
+    if value is not None:
+        cache.move_to_end(key)
+    return value
+
+
+def lru_put(cache: OrderedDict, key: str, value, maxsize: int) -> None:
+    """Insert into an LRU cache, evicting the least-recently-used entry."""
+    cache[key] = value
+    cache.move_to_end(key)
+    if len(cache) > maxsize:
+        cache.popitem(last=False)
+
+
+def match_brands(
+    name: str | None, manufacturer_data: dict, service_uuids: list[str]
+) -> tuple[str, ...]:
+    """Return the brands whose fingerprint matches this advertisement."""
+    matched = []
+    mfr_keys = manufacturer_data.keys()
+    for brand in BRANDS:
+        company_ids = BRAND_COMPANY_IDS.get(brand)
+        if company_ids is not None and not company_ids.isdisjoint(mfr_keys):
+            matched.append(brand)
+            continue
+        if name and name.startswith(BRAND_NAME_PREFIXES[brand]):
+            matched.append(brand)
+            continue
+        uuid_prefixes = BRAND_SERVICE_UUID_PREFIXES.get(brand)
+        if uuid_prefixes is not None and any(u.startswith(uuid_prefixes) for u in service_uuids):
+            matched.append(brand)
+    return tuple(matched)
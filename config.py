@@ -10,5 +10,10 @@ MQTT_USE_TLS = os.getenv("MQTT_USE_TLS", "true").lower() == "true"
 # MQTT Topic prefix
 MQTT_TOPIC_PREFIX = os.getenv("MQTT_TOPIC_PREFIX", "sensors")
 
+# Compact topic scheme: prefix/<last 6 hex chars of MAC>/<single-letter code>
+# instead of prefix/<brand>/<mac>/<sensor type>. Saves ~2/3 of the topic
+# bytes per message; off by default so existing subscribers keep working.
+MQTT_TOPIC_COMPACT = os.getenv("MQTT_TOPIC_COMPACT", "false").lower() == "true"
+
 # Logging
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
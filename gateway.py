@@ -5,13 +5,24 @@ import asyncio
 import logging
 import signal
 import ssl
+import struct
 import sys
 import time
+from collections import OrderedDict
+from collections.abc import Callable
+from weakref import WeakValueDictionary
 
-import paho.mqtt.client as mqtt
+import aiomqtt
 from bleak import BleakScanner
 from bleak.backends.device import BLEDevice
 from bleak.backends.scanner import AdvertisementData
+from bleak.exc import BleakError
+
+if sys.platform == "linux":
+    from bleak.assigned_numbers import AdvertisementDataType
+    from bleak.backends.bluezdbus.advertisement_monitor import OrPattern
+    from bleak.backends.bluezdbus.scanner import BlueZScannerArgs
+
 from govee_ble import GoveeBluetoothDeviceData
 from thermopro_ble import ThermoProBluetoothDeviceData
 from inkbird_ble import INKBIRDBluetoothDeviceData
@@ -21,6 +32,15 @@ from home_assistant_bluetooth import BluetoothServiceInfoBleak
 from sensor_state_data import SensorDeviceClass
 
 import config
+from _fastpath import (
+    BRAND_COMPANY_IDS,
+    BRAND_NAME_PREFIXES,
+    BRAND_SERVICE_UUID_PREFIXES,
+    PAYLOAD_FORMATTERS,
+    lru_get,
+    lru_put,
+    match_brands,
+)
 
 logging.basicConfig(
     level=getattr(logging, config.LOG_LEVEL),
@@ -28,190 +48,426 @@ logging.basicConfig(
 )
 logger = logging.getLogger("ble-gateway")
 
+# On macOS bleak hands back objc proxy types that have to be coerced into
+# regular Python objects; on Linux/Windows they are already plain
+# str/bytes/dict and the copies would be pure overhead.
+_NEED_OBJC_COERCE = sys.platform == "darwin"
+
+# Bound at import so the per-advertisement timestamp skips the module
+# attribute lookup.
+_monotonic = time.monotonic
+
+# Upper bound for the per-address dispatch cache so a busy RF environment
+# (random MACs from passing phones) cannot grow it forever.
+ADDRESS_CACHE_MAX = 1000
+
+# How often queued sensor values are flushed to MQTT, in seconds.
+MQTT_FLUSH_INTERVAL = 0.5
+
+# MQTT keepalive, in seconds.  Sensor values flow every flush interval
+# anyway, so a longer keepalive just means fewer PINGREQ packets.
+MQTT_KEEPALIVE = 120
+
+# How long to wait before reconnecting after the broker connection drops.
+MQTT_RECONNECT_INTERVAL = 5
+
+# Allow more QoS>0 messages in flight than paho's default of 20 so bursts
+# of publishes never queue behind acknowledgements.
+MQTT_MAX_INFLIGHT = 200
+
+# Single-letter sensor codes used by the compact topic scheme
+# (config.MQTT_TOPIC_COMPACT).
+SENSOR_CODES = {
+    "temperature": "t",
+    "humidity": "h",
+    "battery": "b",
+    "pressure": "p",
+    "voltage": "v",
+}
+
+# Maps a parser's device_class to the published sensor type, the log label,
+# and the unit used in log output.  One dict probe replaces the old
+# if/elif chain on the per-entity hot path.
+CLASS_TO_TYPE: dict[SensorDeviceClass, tuple[str, str, str]] = {
+    SensorDeviceClass.TEMPERATURE: ("temperature", "Temperature", "°C"),
+    SensorDeviceClass.HUMIDITY: ("humidity", "Humidity", "%"),
+    SensorDeviceClass.BATTERY: ("battery", "Battery", "%"),
+    SensorDeviceClass.PRESSURE: ("pressure", "Pressure", " hPa"),
+    SensorDeviceClass.VOLTAGE: ("voltage", "Voltage", "V"),
+}
+
+def _bluez_or_patterns() -> list:
+    """BlueZ advertisement patterns covering the supported brands.
+
+    With these installed, BlueZ filters advertisements in the kernel and
+    unrelated devices never reach Python at all.
+    """
+    patterns = [
+        # Manufacturer data starts with the company ID, little-endian.
+        OrPattern(0, AdvertisementDataType.MANUFACTURER_SPECIFIC_DATA, struct.pack("<H", company_id))
+        for company_ids in BRAND_COMPANY_IDS.values()
+        for company_id in company_ids
+    ]
+    for prefixes in BRAND_NAME_PREFIXES.values():
+        for prefix in prefixes:
+            data = prefix.encode()
+            patterns.append(OrPattern(0, AdvertisementDataType.COMPLETE_LOCAL_NAME, data))
+            patterns.append(OrPattern(0, AdvertisementDataType.SHORTENED_LOCAL_NAME, data))
+    # Brands fingerprinted by an advertised 128-bit service UUID: the AD
+    # payload carries the UUID little-endian, so the string-prefix base
+    # sits at the tail of the 16-byte encoding.
+    for uuid_prefixes in BRAND_SERVICE_UUID_PREFIXES.values():
+        for uuid_prefix in uuid_prefixes:
+            base = bytes.fromhex(uuid_prefix.rstrip("-"))[::-1]
+            for ad_type in (
+                AdvertisementDataType.INCOMPLETE_LIST_SERVICE_UUID128,
+                AdvertisementDataType.COMPLETE_LIST_SERVICE_UUID128,
+            ):
+                patterns.append(OrPattern(16 - len(base), ad_type, base))
+    return patterns
+
+
+_SSL_CONTEXT: ssl.SSLContext | None = None
+
+
+def _ssl_context() -> ssl.SSLContext:
+    """Return the shared TLS context, creating it on first use.
+
+    Loading the CA bundle costs tens of milliseconds of disk I/O; keeping
+    one context means reconnects never pay it again.
+    """
+    global _SSL_CONTEXT
+    if _SSL_CONTEXT is None:
+        _SSL_CONTEXT = ssl.create_default_context()
+    return _SSL_CONTEXT
+
+
+if config.MQTT_USE_TLS:
+    # Pre-warm at import so the CA bundle is read before the event loop
+    # and signal handlers are installed.
+    _ssl_context()
+
 
 class BLEGateway:
     def __init__(self):
-        self.mqtt_client: mqtt.Client | None = None
-        self.govee_parsers: dict[str, GoveeBluetoothDeviceData] = {}
-        self.thermopro_parsers: dict[str, ThermoProBluetoothDeviceData] = {}
-        self.inkbird_parsers: dict[str, INKBIRDBluetoothDeviceData] = {}
-        self.sensorpush_parsers: dict[str, SensorPushBluetoothDeviceData] = {}
-        self.ruuvi_parsers: dict[str, RuuvitagBluetoothDeviceData] = {}
+        self.mqtt_client: aiomqtt.Client | None = None
+        # Weak values: the dispatch cache below holds the strong reference
+        # (via the bound update method) for classified devices, so parsers
+        # for devices that never classify are collected automatically.
+        self.govee_parsers: WeakValueDictionary[str, GoveeBluetoothDeviceData] = WeakValueDictionary()
+        self.thermopro_parsers: WeakValueDictionary[str, ThermoProBluetoothDeviceData] = WeakValueDictionary()
+        self.inkbird_parsers: WeakValueDictionary[str, INKBIRDBluetoothDeviceData] = WeakValueDictionary()
+        self.sensorpush_parsers: WeakValueDictionary[str, SensorPushBluetoothDeviceData] = WeakValueDictionary()
+        self.ruuvi_parsers: WeakValueDictionary[str, RuuvitagBluetoothDeviceData] = WeakValueDictionary()
+        self.parser_getters = {
+            "govee": self.get_govee_parser,
+            "thermopro": self.get_thermopro_parser,
+            "inkbird": self.get_inkbird_parser,
+            "sensorpush": self.get_sensorpush_parser,
+            "ruuvi": self.get_ruuvi_parser,
+        }
+        # Sticky dispatch: once an address is classified, route straight to
+        # that brand's parser instead of re-running the fingerprint trials.
+        self.address_to_parser: OrderedDict[str, tuple[str, Callable]] = OrderedDict()
+        # Last advertisement payload snapshot per address: beacons repeat
+        # the same bytes several times per interval and re-parsing them is
+        # wasted.
+        self._last_seen_payload: OrderedDict[str, tuple] = OrderedDict()
+        # Per-device service-info fields that never change between
+        # advertisements, so they are only computed on first sight.
+        self._static_info: OrderedDict[str, dict] = OrderedDict()
+        # Sensor values queued for the next flush, and the values already on
+        # the broker (retained), so unchanged readings are not re-published.
+        self.pending: dict[tuple[str, str, str], str] = {}
+        self.last_published: dict[tuple[str, str, str], str] = {}
+        # Normalized MAC and topic strings per (address, brand, sensor_type),
+        # so the hot path does not rebuild them on every publish.
+        self._topic_cache: dict[tuple[str, str, str], str] = {}
         self.running = False
+        # Created inside run() because asyncio.Event is bound to the loop.
+        self._stop_event: asyncio.Event | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def setup_mqtt(self) -> aiomqtt.Client:
+        """Build the MQTT client; the connection is managed by _mqtt_loop."""
+        return aiomqtt.Client(
+            config.MQTT_BROKER,
+            port=config.MQTT_PORT,
+            username=config.MQTT_USERNAME or None,
+            password=config.MQTT_PASSWORD or None,
+            tls_context=_ssl_context() if config.MQTT_USE_TLS else None,
+            keepalive=MQTT_KEEPALIVE,
+            max_inflight_messages=MQTT_MAX_INFLIGHT,
+        )
 
-    def setup_mqtt(self) -> mqtt.Client:
-        """Set up and connect MQTT client."""
-        client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2)
-        client.username_pw_set(config.MQTT_USERNAME, config.MQTT_PASSWORD)
-
-        if config.MQTT_USE_TLS:
-            ssl_context = ssl.create_default_context()
-            client.tls_set_context(ssl_context)
-
-        client.on_connect = self._on_mqtt_connect
-        client.on_disconnect = self._on_mqtt_disconnect
-
-        logger.info(f"Connecting to MQTT broker {config.MQTT_BROKER}:{config.MQTT_PORT}")
-        client.connect(config.MQTT_BROKER, config.MQTT_PORT)
-        client.loop_start()
-
-        return client
-
-    def _on_mqtt_connect(self, client, userdata, flags, reason_code, properties):
-        if reason_code == 0:
-            logger.info("Connected to MQTT broker")
-        else:
-            logger.error(f"MQTT connection failed: {reason_code}")
-
-    def _on_mqtt_disconnect(self, client, userdata, flags, reason_code, properties):
-        logger.warning(f"Disconnected from MQTT broker: {reason_code}")
+    async def _mqtt_loop(self):
+        """Maintain the MQTT connection and flush queued sensor values."""
+        while self.running:
+            try:
+                logger.info("Connecting to MQTT broker %s:%s", config.MQTT_BROKER, config.MQTT_PORT)
+                async with self.setup_mqtt() as client:
+                    self.mqtt_client = client
+                    logger.info("Connected to MQTT broker")
+                    while self.running:
+                        await asyncio.sleep(MQTT_FLUSH_INTERVAL)
+                        await self._flush_pending()
+                    # Final flush so readings queued during shutdown get out.
+                    await self._flush_pending()
+            except aiomqtt.MqttError as err:
+                self.mqtt_client = None
+                if not self.running:
+                    break
+                logger.warning("MQTT error (%s), reconnecting in %s s", err, MQTT_RECONNECT_INTERVAL)
+                # The broker's retained state is unknown after a drop, so
+                # republish everything once values come in again.
+                self.last_published.clear()
+                await asyncio.sleep(MQTT_RECONNECT_INTERVAL)
+            else:
+                self.mqtt_client = None
 
     def get_govee_parser(self, address: str) -> GoveeBluetoothDeviceData:
         """Get or create a Govee parser for a device."""
-        if address not in self.govee_parsers:
-            self.govee_parsers[address] = GoveeBluetoothDeviceData()
-        return self.govee_parsers[address]
+        parser = self.govee_parsers.get(address)
+        if parser is None:
+            parser = self.govee_parsers[address] = GoveeBluetoothDeviceData()
+        return parser
 
     def get_thermopro_parser(self, address: str) -> ThermoProBluetoothDeviceData:
         """Get or create a ThermoPro parser for a device."""
-        if address not in self.thermopro_parsers:
-            self.thermopro_parsers[address] = ThermoProBluetoothDeviceData()
-        return self.thermopro_parsers[address]
+        parser = self.thermopro_parsers.get(address)
+        if parser is None:
+            parser = self.thermopro_parsers[address] = ThermoProBluetoothDeviceData()
+        return parser
 
     def get_inkbird_parser(self, address: str) -> INKBIRDBluetoothDeviceData:
         """Get or create an Inkbird parser for a device."""
-        if address not in self.inkbird_parsers:
-            self.inkbird_parsers[address] = INKBIRDBluetoothDeviceData()
-        return self.inkbird_parsers[address]
+        parser = self.inkbird_parsers.get(address)
+        if parser is None:
+            parser = self.inkbird_parsers[address] = INKBIRDBluetoothDeviceData()
+        return parser
 
     def get_sensorpush_parser(self, address: str) -> SensorPushBluetoothDeviceData:
         """Get or create a SensorPush parser for a device."""
-        if address not in self.sensorpush_parsers:
-            self.sensorpush_parsers[address] = SensorPushBluetoothDeviceData()
-        return self.sensorpush_parsers[address]
+        parser = self.sensorpush_parsers.get(address)
+        if parser is None:
+            parser = self.sensorpush_parsers[address] = SensorPushBluetoothDeviceData()
+        return parser
 
     def get_ruuvi_parser(self, address: str) -> RuuvitagBluetoothDeviceData:
         """Get or create a Ruuvi parser for a device."""
-        if address not in self.ruuvi_parsers:
-            self.ruuvi_parsers[address] = RuuvitagBluetoothDeviceData()
-        return self.ruuvi_parsers[address]
+        parser = self.ruuvi_parsers.get(address)
+        if parser is None:
+            parser = self.ruuvi_parsers[address] = RuuvitagBluetoothDeviceData()
+        return parser
 
     def publish_sensor_data(self, address: str, brand: str, sensor_type: str, value: float):
-        """Publish sensor data to MQTT."""
+        """Queue sensor data for the next MQTT flush."""
+        payload = PAYLOAD_FORMATTERS[sensor_type](value)
+        self.pending[(address, brand, sensor_type)] = payload
+
+    def _build_topic(self, address: str, brand: str, sensor_type: str) -> str:
+        """Build the MQTT topic for a sensor; results are cached by the caller."""
         mac = address.lower().replace("-", ":")
-        topic = f"{config.MQTT_TOPIC_PREFIX}/{brand}/{mac}/{sensor_type}"
-        payload = str(round(value, 1) if sensor_type != "battery" else int(value))
+        if config.MQTT_TOPIC_COMPACT:
+            # prefix/a838f2/t instead of prefix/govee/a4:c1:38:a8:38:f2/temperature
+            short_id = mac.replace(":", "")[-6:]
+            return f"{config.MQTT_TOPIC_PREFIX}/{short_id}/{SENSOR_CODES[sensor_type]}"
+        return f"{config.MQTT_TOPIC_PREFIX}/{brand}/{mac}/{sensor_type}"
+
+    async def _flush_pending(self):
+        """Publish queued sensor values, skipping ones the broker already has."""
+        if not self.pending or self.mqtt_client is None:
+            return
+        pending, self.pending = self.pending, {}
 
-        result = self.mqtt_client.publish(topic, payload, retain=True)
-        if result.rc == mqtt.MQTT_ERR_SUCCESS:
-            logger.debug(f"Published {topic}: {payload}")
-        else:
-            logger.error(f"Failed to publish to {topic}: {result.rc}")
+        for key, payload in pending.items():
+            if self.last_published.get(key) == payload:
+                continue
+            topic = self._topic_cache.get(key)
+            if topic is None:
+                topic = self._topic_cache[key] = self._build_topic(*key)
+
+            await self.mqtt_client.publish(topic, payload, qos=0, retain=True)
+            self.last_published[key] = payload
+            logger.debug("Published %s: %s", topic, payload)
 
     def process_sensor_update(self, device: BLEDevice, update, brand: str):
         """Process sensor update and publish to MQTT."""
         if not update.entity_values:
             return False
 
-        logger.info(f"Device: {device.address} ({device.name or 'Unknown'}) [{brand}]")
+        logger.info("Device: %s (%s) [%s]", device.address, device.name or "Unknown", brand)
 
         for device_key, sensor_value in update.entity_values.items():
             description = update.entity_descriptions.get(device_key)
             if not description:
                 continue
 
-            device_class = description.device_class
-
-            if device_class == SensorDeviceClass.TEMPERATURE:
-                self.publish_sensor_data(device.address, brand, "temperature", sensor_value.native_value)
-                logger.info(f"  Temperature: {sensor_value.native_value}°C")
-
-            elif device_class == SensorDeviceClass.HUMIDITY:
-                self.publish_sensor_data(device.address, brand, "humidity", sensor_value.native_value)
-                logger.info(f"  Humidity: {sensor_value.native_value}%")
-
-            elif device_class == SensorDeviceClass.BATTERY:
-                self.publish_sensor_data(device.address, brand, "battery", sensor_value.native_value)
-                logger.info(f"  Battery: {sensor_value.native_value}%")
-
-            elif device_class == SensorDeviceClass.PRESSURE:
-                self.publish_sensor_data(device.address, brand, "pressure", sensor_value.native_value)
-                logger.info(f"  Pressure: {sensor_value.native_value} hPa")
+            entry = CLASS_TO_TYPE.get(description.device_class)
+            if entry is None:
+                continue
+            sensor_type, label, unit = entry
 
-            elif device_class == SensorDeviceClass.VOLTAGE:
+            value = sensor_value.native_value
+            if sensor_type == "voltage" and value > 100:
                 # Ruuvi reports voltage in millivolts, convert to volts
-                voltage_v = sensor_value.native_value / 1000 if sensor_value.native_value > 100 else sensor_value.native_value
-                self.publish_sensor_data(device.address, brand, "voltage", voltage_v)
-                logger.info(f"  Voltage: {voltage_v}V")
+                value = value / 1000
+
+            self.publish_sensor_data(device.address, brand, sensor_type, value)
+            logger.info("  %s: %s%s", label, value, unit)
 
         return True
 
-    def detection_callback(self, device: BLEDevice, advertisement_data: AdvertisementData):
-        """Handle BLE advertisement detection."""
-        # Wrap bleak data into Home Assistant Bluetooth format
-        # Convert objc types to regular Python types for macOS compatibility
-        service_info = BluetoothServiceInfoBleak(
-            name=str(device.name) if device.name else str(device.address),
-            address=str(device.address),
-            rssi=int(advertisement_data.rssi) if advertisement_data.rssi else -127,
-            manufacturer_data=dict(advertisement_data.manufacturer_data),
-            service_data={str(k): v for k, v in advertisement_data.service_data.items()},
-            service_uuids=[str(u) for u in advertisement_data.service_uuids],
-            source="local",
+    def _make_service_info(self, device: BLEDevice, advertisement_data: AdvertisementData) -> BluetoothServiceInfoBleak:
+        """Wrap bleak data into Home Assistant Bluetooth format."""
+        # name/address/source/connectable never change for a device, so
+        # compute them once and reuse the kwargs dict on every advertisement
+        # (refreshing the name if a real one replaces the address fallback).
+        static = lru_get(self._static_info, device.address)
+        if static is None or (device.name and static["name"] != device.name):
+            if _NEED_OBJC_COERCE:
+                # Convert objc types to regular Python types for macOS compatibility
+                name = str(device.name) if device.name else str(device.address)
+                address = str(device.address)
+            else:
+                name = device.name or device.address
+                address = device.address
+            static = {"name": name, "address": address, "source": "local", "connectable": False}
+            lru_put(self._static_info, device.address, static, ADDRESS_CACHE_MAX)
+
+        if _NEED_OBJC_COERCE:
+            rssi = int(advertisement_data.rssi) if advertisement_data.rssi else -127
+            manufacturer_data = dict(advertisement_data.manufacturer_data)
+            service_data = {str(k): v for k, v in advertisement_data.service_data.items()}
+            service_uuids = [str(u) for u in advertisement_data.service_uuids]
+            tx_power = int(advertisement_data.tx_power) if advertisement_data.tx_power else None
+        else:
+            rssi = advertisement_data.rssi or -127
+            manufacturer_data = advertisement_data.manufacturer_data
+            service_data = advertisement_data.service_data
+            service_uuids = advertisement_data.service_uuids
+            tx_power = advertisement_data.tx_power
+
+        return BluetoothServiceInfoBleak(
+            **static,
+            rssi=rssi,
+            manufacturer_data=manufacturer_data,
+            service_data=service_data,
+            service_uuids=service_uuids,
             device=device,
             advertisement=advertisement_data,
-            connectable=False,
-            time=time.monotonic(),
-            tx_power=int(advertisement_data.tx_power) if advertisement_data.tx_power else None,
+            time=_monotonic(),
+            tx_power=tx_power,
         )
 
-        # Try Govee parser
-        govee_parser = self.get_govee_parser(device.address)
-        govee_update = govee_parser.update(service_info)
-        if self.process_sensor_update(device, govee_update, "govee"):
+    def _is_repeat(self, address: str, advertisement_data: AdvertisementData) -> bool:
+        """Check whether this advertisement repeats the last payload seen.
+
+        The parsers are deterministic, so identical bytes would only produce
+        the values the broker already has.
+        """
+        mfr = advertisement_data.manufacturer_data
+        service_data = advertisement_data.service_data
+        if not mfr and not service_data:
+            return False
+        # Snapshot every (key, value) pair: BlueZ accumulates manufacturer
+        # data across advertisements and several brands put each new reading
+        # under a new key, so any single entry can stay unchanged while the
+        # advertisement as a whole carries a fresh reading.
+        payload = (tuple(mfr.items()), tuple(service_data.items()))
+        if lru_get(self._last_seen_payload, address) == payload:
+            return True
+        lru_put(self._last_seen_payload, address, payload, ADDRESS_CACHE_MAX)
+        return False
+
+    def detection_callback(self, device: BLEDevice, advertisement_data: AdvertisementData):
+        """Handle BLE advertisement detection."""
+        # Known device: go straight to the parser it was classified with.
+        entry = lru_get(self.address_to_parser, device.address)
+        if entry is not None:
+            if self._is_repeat(device.address, advertisement_data):
+                return
+            brand, update = entry
+            service_info = self._make_service_info(device, advertisement_data)
+            self.process_sensor_update(device, update(service_info), brand)
             return
 
-        # Try ThermoPro parser
-        thermopro_parser = self.get_thermopro_parser(device.address)
-        thermopro_update = thermopro_parser.update(service_info)
-        if self.process_sensor_update(device, thermopro_update, "thermopro"):
+        # Cheap fingerprint check first: the vast majority of advertisements
+        # come from unrelated devices and should not pay for the
+        # BluetoothServiceInfoBleak construction below.
+        candidates = match_brands(
+            device.name, advertisement_data.manufacturer_data, advertisement_data.service_uuids
+        )
+        if not candidates:
             return
 
-        # Try Inkbird parser
-        inkbird_parser = self.get_inkbird_parser(device.address)
-        inkbird_update = inkbird_parser.update(service_info)
-        if self.process_sensor_update(device, inkbird_update, "inkbird"):
+        if self._is_repeat(device.address, advertisement_data):
             return
 
-        # Try SensorPush parser
-        sensorpush_parser = self.get_sensorpush_parser(device.address)
-        sensorpush_update = sensorpush_parser.update(service_info)
-        if self.process_sensor_update(device, sensorpush_update, "sensorpush"):
+        service_info = self._make_service_info(device, advertisement_data)
+
+        if len(candidates) == 1:
+            # Unambiguous fingerprint: commit to this parser right away, even
+            # if the first advertisement yields no values yet (some models
+            # need a few broadcasts before a full reading comes through), so
+            # later advertisements never re-run the trials.
+            brand = candidates[0]
+            parser = self.parser_getters[brand](device.address)
+            lru_put(self.address_to_parser, device.address, (brand, parser.update), ADDRESS_CACHE_MAX)
+            self.process_sensor_update(device, parser.update(service_info), brand)
             return
 
-        # Try Ruuvi parser
-        ruuvi_parser = self.get_ruuvi_parser(device.address)
-        ruuvi_update = ruuvi_parser.update(service_info)
-        self.process_sensor_update(device, ruuvi_update, "ruuvi")
+        # Ambiguous fingerprint (rare): trial each candidate until one
+        # produces values, then stick with the winner; the losers' trial
+        # parsers are collected once the weak cache drops them.
+        for brand in candidates:
+            parser = self.parser_getters[brand](device.address)
+            if self.process_sensor_update(device, parser.update(service_info), brand):
+                lru_put(self.address_to_parser, device.address, (brand, parser.update), ADDRESS_CACHE_MAX)
+                return
 
     async def run(self):
         """Run the BLE scanner."""
-        self.mqtt_client = self.setup_mqtt()
+        self._loop = asyncio.get_running_loop()
+        self._stop_event = asyncio.Event()
         self.running = True
 
         logger.info("Starting BLE scanner for Govee, ThermoPro, Inkbird, SensorPush, and Ruuvi devices...")
 
-        async with BleakScanner(detection_callback=self.detection_callback):
-            while self.running:
-                await asyncio.sleep(1)
+        mqtt_task = asyncio.create_task(self._mqtt_loop())
+
+        scanner_kwargs: dict = {"detection_callback": self.detection_callback}
+        if sys.platform == "linux":
+            # Passive scanning halves airtime and callback volume (the
+            # sensors put everything in the advertisement, so scan responses
+            # add nothing), and the or_patterns make BlueZ filter by brand
+            # in the kernel before anything reaches Python.
+            scanner_kwargs["scanning_mode"] = "passive"
+            scanner_kwargs["bluez"] = BlueZScannerArgs(or_patterns=_bluez_or_patterns())
+
+        try:
+            async with BleakScanner(**scanner_kwargs):
+                await self._stop_event.wait()
+        except BleakError as err:
+            if scanner_kwargs.get("scanning_mode") != "passive":
+                raise
+            # Passive scanning needs BlueZ >= 5.56 with experimental
+            # features; fall back to active scanning on older stacks.
+            logger.warning("Passive scanning unavailable (%s), falling back to active scanning", err)
+            async with BleakScanner(detection_callback=self.detection_callback):
+                await self._stop_event.wait()
+        finally:
+            self.running = False
+            await mqtt_task
 
-        self.mqtt_client.loop_stop()
-        self.mqtt_client.disconnect()
         logger.info("Gateway stopped")
 
     def stop(self):
-        """Stop the gateway."""
+        """Stop the gateway.  Safe to call from a signal handler."""
         self.running = False
+        if self._loop is not None and self._stop_event is not None:
+            # The event is loop-affine; signal handlers run outside the loop.
+            self._loop.call_soon_threadsafe(self._stop_event.set)
 
 
 def main():